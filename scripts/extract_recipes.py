@@ -8,17 +8,25 @@ from pathlib import Path
 from openai import OpenAI
 from pydantic import ValidationError
 
+from foodiegram.batch_tasks import (
+    MIN_CAPTION_LENGTH,
+    build_batch_tasks,
+    extraction_prompt,
+    extraction_schema,
+    fan_out_targets,
+    index_recipes,
+    needs_extraction,
+    result_fingerprint,
+)
 from foodiegram.domain.models import ExtractedRecipe, Recipe
 from foodiegram.repository import RecipeRepository
 from foodiegram.settings import Settings
 
 # --- Inputs / constants ---
 MODEL = "gpt-4.1-mini"
-PROMPT_PATH = Path("src/foodiegram/prompts/extract_recipe_details.txt")
 BATCH_INPUT_PATH = Path("data/batch_input.jsonl")
 BATCH_OUTPUT_PATH = Path("data/batch_output.jsonl")
 LAST_BATCH_ID_PATH = Path("data/last_batch_id.txt")
-MIN_CAPTION_LENGTH = 80
 
 logger = logging.getLogger(__name__)
 
@@ -33,19 +41,40 @@ def _load_batch_id(batch_id: str | None) -> str:
     return LAST_BATCH_ID_PATH.read_text(encoding="utf-8").strip()
 
 
-def _needs_extraction(recipe: Recipe, *, force: bool = False) -> bool:
-    """Return True if recipe is eligible for batch extraction.
+def _merge_extraction(
+    existing: Recipe,
+    extracted: ExtractedRecipe,
+    *,
+    fingerprint: str | None,
+    extracted_at: datetime,
+) -> Recipe:
+    """Return existing re-built from a fresh extraction, keeping media and user edits."""
+    return Recipe.from_extracted(
+        code=existing.code,
+        pk=existing.pk,
+        caption=existing.caption,
+        extracted=extracted,
+        model_used=MODEL,
+    ).model_copy(
+        update={
+            "thumbnail_url": existing.thumbnail_url,
+            "cloudinary_url": existing.cloudinary_url,
+            "user_notes": existing.user_notes,
+            "is_favorite": existing.is_favorite,
+            "edited_by_user": existing.edited_by_user,
+            "extracted_at": extracted_at,
+            "extraction_fingerprint": fingerprint,
+        },
+    )
+
 
-    With force=True, re-submit all non-edited recipes with a long enough
-    caption, including those already extracted — use after a prompt change.
-    """
-    if recipe.edited_by_user:
-        return False
-    if recipe.caption is None or len(recipe.caption.strip()) < MIN_CAPTION_LENGTH:
-        return False
-    if force:
-        return True
-    return not recipe.instructions
+def _token_usage(response_body: dict[str, object]) -> tuple[int, int]:
+    """Return (input_tokens, cached_tokens) reported for one response."""
+    usage = response_body.get("usage")
+    if not isinstance(usage, dict):
+        return 0, 0
+    details = usage.get("input_tokens_details") or {}
+    return usage.get("input_tokens", 0), details.get("cached_tokens", 0)
 
 
 def cmd_submit(settings: Settings, *, force: bool = False) -> None:
@@ -53,7 +82,12 @@ def cmd_submit(settings: Settings, *, force: bool = False) -> None:
     repo = RecipeRepository(settings.data_dir)
     all_recipes = repo.list_all()
 
-    to_submit = [r for r in all_recipes if _needs_extraction(r, force=force)]
+    prompt = extraction_prompt()
+    to_submit = [
+        r
+        for r in all_recipes
+        if needs_extraction(r, model=MODEL, prompt=prompt, force=force)
+    ]
     already_extracted = [r for r in all_recipes if r.instructions]
     no_caption = [
         r
@@ -70,45 +104,35 @@ def cmd_submit(settings: Settings, *, force: bool = False) -> None:
         logger.info("Nothing to submit.")
         return
 
-    prompt_template = PROMPT_PATH.read_text(encoding="utf-8")
-    schema = ExtractedRecipe.model_json_schema()
-
-    BATCH_INPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with BATCH_INPUT_PATH.open("w", encoding="utf-8") as fh:
-        for recipe in to_submit:
-            caption = recipe.caption or ""
-            line: dict[str, object] = {
-                "custom_id": recipe.code,
-                "method": "POST",
-                "url": "/v1/responses",
-                "body": {
-                    "model": MODEL,
-                    "input": prompt_template.format(caption=caption),
-                    "text": {
-                        "format": {
-                            "type": "json_schema",
-                            "name": "ExtractedRecipe",
-                            "schema": schema,
-                            "strict": True,
-                        },
-                    },
-                },
-            }
-            fh.write(json.dumps(line, ensure_ascii=False) + "\n")
-
-    logger.info("Wrote %d tasks to %s", len(to_submit), BATCH_INPUT_PATH)
+    tasks = build_batch_tasks(
+        to_submit,
+        model=MODEL,
+        instructions=prompt,
+        schema=extraction_schema(),
+    )
+    if len(tasks) < len(to_submit):
+        logger.info(
+            "Deduplicated to %d unique captions (%d duplicates)",
+            len(tasks),
+            len(to_submit) - len(tasks),
+        )
+    lines = [json.dumps(task, ensure_ascii=False) for task in tasks]
+    payload = "".join(f"{line}\n" for line in lines).encode()
 
+    # Upload straight from memory; the on-disk copy is only for inspection.
     client = OpenAI(api_key=settings.openai_api_key)
+    upload = client.files.create(file=(BATCH_INPUT_PATH.name, payload), purpose="batch")
+    logger.info("Uploaded %d tasks as input file: %s", len(lines), upload.id)
 
-    with BATCH_INPUT_PATH.open("rb") as fh:
-        upload = client.files.create(file=fh, purpose="batch")
-
-    logger.info("Uploaded input file: %s", upload.id)
+    BATCH_INPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    BATCH_INPUT_PATH.write_bytes(payload)
 
+    # cmd_apply reads the flag back to pick which caption siblings to update.
     batch = client.batches.create(
         input_file_id=upload.id,
         endpoint="/v1/responses",
         completion_window="24h",
+        metadata={"force": "true" if force else "false"},
     )
 
     LAST_BATCH_ID_PATH.write_text(batch.id, encoding="utf-8")
@@ -149,15 +173,23 @@ def cmd_apply(settings: Settings, batch_id: str | None) -> None:
         logger.error("Batch %s completed but has no output_file_id", bid)
         sys.exit(1)
 
-    content = client.files.content(batch.output_file_id).text
+    # Stay on bytes end to end: json.loads takes them directly, so decoding the
+    # whole output to str first only doubles the memory for large batches.
+    content = client.files.content(batch.output_file_id).content
     BATCH_OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    BATCH_OUTPUT_PATH.write_text(content, encoding="utf-8")
+    BATCH_OUTPUT_PATH.write_bytes(content)
     logger.info("Downloaded output to %s", BATCH_OUTPUT_PATH)
 
     repo = RecipeRepository(settings.data_dir)
+    by_code, by_caption = index_recipes(repo.list_all())
+    # Batches without metadata predate the flag; treat them as plain submits.
+    force = (batch.metadata or {}).get("force") == "true"
+
     applied = 0
     skipped = 0
     errors = 0
+    input_tokens = 0
+    cached_tokens = 0
     now = datetime.now(tz=UTC)
 
     for raw_line in content.splitlines():
@@ -170,7 +202,7 @@ def cmd_apply(settings: Settings, batch_id: str | None) -> None:
             result: dict[str, object] = json.loads(line)
             code = str(result["custom_id"])
 
-            existing = repo.get(code)
+            existing = by_code.get(code)
             if existing is None:
                 logger.warning("Recipe not found for code %s — skipping", code)
                 skipped += 1
@@ -178,33 +210,40 @@ def cmd_apply(settings: Settings, batch_id: str | None) -> None:
 
             response_body: dict[str, object] = result["response"]["body"]  # type: ignore[index]
             output_text: str = response_body["output"][0]["content"][0]["text"]  # type: ignore[index]
-            extracted = ExtractedRecipe.model_validate(json.loads(output_text))
-
-            updated = Recipe.from_extracted(
-                code=existing.code,
-                pk=existing.pk,
-                caption=existing.caption,
-                extracted=extracted,
-                model_used=MODEL,
-            ).model_copy(
-                update={
-                    "thumbnail_url": existing.thumbnail_url,
-                    "cloudinary_url": existing.cloudinary_url,
-                    "user_notes": existing.user_notes,
-                    "is_favorite": existing.is_favorite,
-                    "edited_by_user": existing.edited_by_user,
-                    "extracted_at": now,
-                },
+            extracted = ExtractedRecipe.model_validate_json(output_text)
+
+            line_input, line_cached = _token_usage(response_body)
+            input_tokens += line_input
+            cached_tokens += line_cached
+
+            targets = fan_out_targets(
+                existing,
+                by_caption,
+                model=MODEL,
+                prompt=extraction_prompt(),
+                force=force,
             )
-
-            repo.save(updated)
-            applied += 1
+            for target in targets:
+                repo.save(
+                    _merge_extraction(
+                        target,
+                        extracted,
+                        fingerprint=result_fingerprint(response_body),
+                        extracted_at=now,
+                    ),
+                )
+                applied += 1
 
         except (KeyError, IndexError, TypeError, json.JSONDecodeError, ValidationError):
             logger.exception("Failed to parse result for code %s", code)
             errors += 1
 
     logger.info("Applied: %d  Skipped: %d  Errors: %d", applied, skipped, errors)
+    logger.info(
+        "Prompt cache: %d of %d input tokens cached",
+        cached_tokens,
+        input_tokens,
+    )
 
 
 def main() -> None:
@@ -223,7 +262,7 @@ def main() -> None:
     submit_parser.add_argument(
         "--force",
         action="store_true",
-        help="Re-submit all eligible recipes, including those already extracted",
+        help="Re-submit eligible recipes whose model, prompt or caption changed",
     )
 
     status_parser = subparsers.add_parser("status", help="Check batch status")
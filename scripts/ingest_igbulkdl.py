@@ -26,7 +26,7 @@ DATA_DIR = Path("data/recipes")
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class _Item:
     """Parsed representation of one IGbulkDL log entry."""
 
@@ -37,7 +37,7 @@ class _Item:
     thumbnail_url: str
 
 
-@dataclass
+@dataclass(slots=True)
 class _Stats:
     """Running totals for the summary line."""
 
@@ -0,0 +1,197 @@
+import functools
+import hashlib
+import re
+from collections import defaultdict
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from foodiegram.domain import ExtractedRecipe, Recipe
+
+_PROMPT_PATH = Path(__file__).parent / "prompts" / "extract_recipe_details.txt"
+
+# Short captions with no quantities or cooking vocabulary (English or Italian)
+# are food photos, not recipes; they are skipped before paying for an LLM call.
+MIN_CAPTION_LENGTH = 80
+_RECIPE_HINT_RE = re.compile(
+    r"\d+\s*(?:g|gr|kg|ml|l|oz|lb|cups?|tbsp|tsp)\b"
+    r"|\b(?:ingredients?|ingredient[ei]|recipe|ricetta|bake|cook|whisk|boil|roast"
+    r"|fry|forno|cuocere|cottura|impastare|mescolare|q\.b)\b",
+    re.IGNORECASE,
+)
+
+
+def looks_like_recipe(caption: str) -> bool:
+    """Return False for captions too short and too vague to be a recipe."""
+    return (
+        len(caption) >= MIN_CAPTION_LENGTH or _RECIPE_HINT_RE.search(caption) is not None
+    )
+
+
+def prompt_caption(caption: str) -> str:
+    """Return caption without its trailing block of hashtags and mentions."""
+    # The closing tag cloud carries no recipe content but costs input tokens on
+    # every task. Inline tags are kept: they are often dish names or dietary
+    # cues ("la mia #carbonara", "#vegan"). One right-to-left scan finds where
+    # the tag block starts, visiting each character once; a regex over the
+    # block backtracks exponentially on runs like "#a#a#a… text".
+    cut = len(caption.rstrip())
+    while cut:
+        start = cut
+        while start and not caption[start - 1].isspace():
+            start -= 1
+        if caption[start] not in "#@":
+            break
+        cut = start
+        while cut and caption[cut - 1].isspace():
+            cut -= 1
+    return caption[:cut]
+
+
+@functools.cache
+def extraction_prompt() -> str:
+    """Return the recipe extraction prompt, read from disk once per process."""
+    return _PROMPT_PATH.read_text(encoding="utf-8")
+
+
+@functools.cache
+def extraction_schema() -> dict[str, Any]:
+    """Return the ExtractedRecipe JSON schema, generated once per process."""
+    return ExtractedRecipe.model_json_schema()
+
+
+def extraction_fingerprint(model: str, instructions: str, caption: str) -> str:
+    """Return a content hash identifying one extraction's exact inputs."""
+    return hashlib.sha256(f"{model}|{instructions}|{caption}".encode()).hexdigest()
+
+
+def needs_extraction(
+    recipe: Recipe,
+    *,
+    model: str,
+    prompt: str,
+    force: bool = False,
+) -> bool:
+    """Return True if recipe is eligible for batch extraction.
+
+    With force=True, re-submit all non-edited recipes with a long enough
+    caption, including those already extracted — use after a prompt change.
+    Recipes whose stored fingerprint shows they were already extracted from
+    this exact model, prompt and caption are skipped even then.
+    """
+    if recipe.edited_by_user:
+        return False
+    if recipe.caption is None or len(recipe.caption.strip()) < MIN_CAPTION_LENGTH:
+        return False
+    if force:
+        current = extraction_fingerprint(model, prompt, recipe.caption)
+        return recipe.extraction_fingerprint != current
+    return not recipe.instructions
+
+
+def result_fingerprint(response_body: dict[str, Any]) -> str | None:
+    """Return the fingerprint a task attached to its response, if any."""
+    # The Responses API types metadata as optional, so it may come back null.
+    metadata = response_body.get("metadata")
+    return metadata.get("fingerprint") if isinstance(metadata, dict) else None
+
+
+def build_batch_task(
+    custom_id: str,
+    caption: str,
+    *,
+    model: str,
+    instructions: str,
+    schema: dict[str, Any],
+) -> dict[str, Any]:
+    """Build one Batch API task that extracts a recipe from a caption.
+
+    The prompt goes in ``instructions`` so every task starts with the same
+    bit-identical prefix, which OpenAI's prompt cache reuses across the batch;
+    the caption is the only per-task input. An explicit prompt_cache_key keeps
+    tasks on the same cache shard and changes whenever the model or prompt
+    does. The inputs' fingerprint rides along as response metadata so results
+    can be tagged with what produced them.
+    """
+    prompt_digest = hashlib.sha256(f"{model}|{instructions}".encode()).hexdigest()
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/responses",
+        "body": {
+            "model": model,
+            "instructions": instructions,
+            "input": f'Caption: "{prompt_caption(caption)}"',
+            "prompt_cache_key": f"recipe-extraction-{prompt_digest[:16]}",
+            "metadata": {
+                "fingerprint": extraction_fingerprint(model, instructions, caption),
+            },
+            "text": {
+                "format": {
+                    "type": "json_schema",
+                    "name": "ExtractedRecipe",
+                    "schema": schema,
+                    "strict": True,
+                },
+            },
+        },
+    }
+
+
+def build_batch_tasks(
+    recipes: Iterable[Recipe],
+    *,
+    model: str,
+    instructions: str,
+    schema: dict[str, Any],
+) -> list[dict[str, Any]]:
+    """Build one task per distinct caption, keyed by its first recipe's code."""
+    # Reposts and carousel duplicates often share a caption word for word.
+    # Extract each distinct caption once; fan_out_targets shares the result.
+    unique: dict[str | None, Recipe] = {}
+    for recipe in recipes:
+        unique.setdefault(recipe.caption, recipe)
+    return [
+        build_batch_task(
+            recipe.code,
+            recipe.caption or "",
+            model=model,
+            instructions=instructions,
+            schema=schema,
+        )
+        for recipe in unique.values()
+    ]
+
+
+def index_recipes(
+    recipes: Iterable[Recipe],
+) -> tuple[dict[str, Recipe], dict[str, list[Recipe]]]:
+    """Index all recipes by code, and non-edited ones by caption, in one pass."""
+    by_code: dict[str, Recipe] = {}
+    by_caption: dict[str, list[Recipe]] = defaultdict(list)
+    for recipe in recipes:
+        by_code[recipe.code] = recipe
+        if recipe.caption is not None and not recipe.edited_by_user:
+            by_caption[recipe.caption].append(recipe)
+    return by_code, by_caption
+
+
+def fan_out_targets(
+    submitted: Recipe,
+    by_caption: dict[str, list[Recipe]],
+    *,
+    model: str,
+    prompt: str,
+    force: bool,
+) -> list[Recipe]:
+    """Return submitted plus the caption siblings its submit would have selected.
+
+    Siblings already extracted, or current under force, keep their own data.
+    """
+    siblings = [
+        r
+        for r in by_caption.get(submitted.caption or "", [])
+        if r.code != submitted.code
+        and needs_extraction(r, model=model, prompt=prompt, force=force)
+    ]
+    return [submitted, *siblings]
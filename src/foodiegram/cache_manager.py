@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import json
 import logging
 from pathlib import Path
 
@@ -31,6 +30,10 @@ class CacheManager:
         """Directory where collections are cached."""
         return self.cache_dir / "collections"
 
+    def cached_post_pks(self) -> set[str]:
+        """Return the pks of all cached posts from a single directory listing."""
+        return {f.stem for f in self.posts_dir.iterdir() if f.suffix == ".json"}
+
     def get_post(self, post_pk: str) -> Media | None:
         """Get a single cached post by pk."""
         post_file = self.posts_dir / f"{post_pk}.json"
@@ -53,10 +56,9 @@ class CacheManager:
 
         if collection_file.exists():
             try:
-                data = json.loads(collection_file.read_text())
-                return Collection(**data)
+                return Collection.model_validate_json(collection_file.read_bytes())
             except Exception:
-                logger.exception("Error loading collection %d:", collection_id)
+                logger.exception("Error loading collection %s:", collection_id)
                 return None
         return None
 
@@ -86,7 +88,7 @@ class CacheManager:
             )
 
         collection_file = self.collections_dir / f"{collection_id}.json"
-        collection_file.write_text(collection.model_dump_json(indent=2))
+        collection_file.write_text(collection.model_dump_json())
 
         self.save_posts(posts)
         return collection
@@ -1,5 +1,6 @@
 import re
 from datetime import datetime
+from enum import StrEnum
 from typing import TYPE_CHECKING
 
 from pydantic import BaseModel, ConfigDict, Field
@@ -9,6 +10,15 @@ from foodiegram.domain.enums import CuisineType, Difficulty, DishType, MealType
 if TYPE_CHECKING:
     from instagrapi.types import Media
 
+_FIRST_NUMBER_RE = re.compile(r"\d+")
+
+
+def _coerce[E: StrEnum](enum_cls: type[E], value: str, default: E) -> E:
+    """Return value as a member of enum_cls, or default if it is not one."""
+    # Membership is a value-map lookup; unknown LLM values are common, and
+    # raising/catching ValueError for each one is needlessly expensive.
+    return enum_cls(value) if value in enum_cls else default
+
 
 class ExtractedRecipe(BaseModel):
     """Shape returned by OpenAI; validated before storing."""
@@ -126,6 +136,7 @@ class Recipe(BaseModel):
     confidence: float = Field(default=1.0, ge=0.0, le=1.0)
     extracted_at: datetime | None = None
     model_used: str | None = None
+    extraction_fingerprint: str | None = None
     edited_by_user: bool = False
 
     @classmethod
@@ -141,30 +152,10 @@ class Recipe(BaseModel):
         """Construct a Recipe from an ExtractedRecipe."""
         base_servings: int | None = None
         if extracted.servings:
-            match = re.search(r"\d+", extracted.servings)
+            match = _FIRST_NUMBER_RE.search(extracted.servings)
             if match:
                 base_servings = int(match.group())
 
-        try:
-            meal_type = MealType(extracted.meal_type)
-        except ValueError:
-            meal_type = MealType.UNKNOWN
-
-        try:
-            dish_type = DishType(extracted.dish_type)
-        except ValueError:
-            dish_type = DishType.UNKNOWN
-
-        try:
-            cuisine_type = CuisineType(extracted.cuisine_type)
-        except ValueError:
-            cuisine_type = CuisineType.UNKNOWN
-
-        try:
-            difficulty = Difficulty(extracted.difficulty)
-        except ValueError:
-            difficulty = Difficulty.UNKNOWN
-
         return cls(
             code=code,
             pk=pk,
@@ -173,10 +164,14 @@ class Recipe(BaseModel):
             title=extracted.title,
             ingredients=extracted.ingredients,
             instructions=extracted.instructions,
-            meal_type=meal_type,
-            dish_type=dish_type,
-            cuisine_type=cuisine_type,
-            difficulty=difficulty,
+            meal_type=_coerce(MealType, extracted.meal_type, MealType.UNKNOWN),
+            dish_type=_coerce(DishType, extracted.dish_type, DishType.UNKNOWN),
+            cuisine_type=_coerce(
+                CuisineType,
+                extracted.cuisine_type,
+                CuisineType.UNKNOWN,
+            ),
+            difficulty=_coerce(Difficulty, extracted.difficulty, Difficulty.UNKNOWN),
             proteins=extracted.proteins,
             vegetables=extracted.vegetables,
             grains_starches=extracted.grains_starches,
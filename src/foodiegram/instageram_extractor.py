@@ -24,6 +24,16 @@ _DEFAULT_CACHE_DIR = Path("cache")
 _DEFAULT_GQL_DELAY = 1.5
 
 
+def _pace(last_call: float, min_interval: float) -> float:
+    """Sleep until min_interval has passed since last_call; return the new time."""
+    # The request itself counts toward the interval, so a slow endpoint is not
+    # followed by the full delay again.
+    wait = min_interval - (time.monotonic() - last_call)
+    if wait > 0:
+        time.sleep(wait)
+    return time.monotonic()
+
+
 class InstagramExtractor:
     """Class to handle extraction of saved posts from Instagram."""
 
@@ -187,9 +197,13 @@ class InstagramExtractor:
         fetched = 0
         skipped = 0
         failed: list[str] = []
+        # One listing up front so uncached pks skip the disk entirely; hits are
+        # still loaded so a corrupt cache file gets re-fetched.
+        cached = self.cache_manager.cached_post_pks()
+        last_call = float("-inf")
 
         for i, pk in enumerate(pks, start=1):
-            if self.cache_manager.get_post(pk) is not None:
+            if pk in cached and self.cache_manager.get_post(pk) is not None:
                 skipped += 1
                 logger.debug("[%d/%d] %s already cached — skipping", i, total, pk)
                 continue
@@ -201,6 +215,7 @@ class InstagramExtractor:
                 fetched,
                 len(failed),
             )
+            last_call = _pace(last_call, delay)
             try:
                 media: Media = self._fetch_media(pk)
                 self.cache_manager.save_post(media)
@@ -209,7 +224,6 @@ class InstagramExtractor:
             except (InstagramFetchError, ClientError):
                 logger.exception("[%d/%d] failed pk=%s", i, total, pk)
                 failed.append(pk)
-            time.sleep(delay)
 
         return fetched, skipped, failed
 
@@ -229,6 +243,7 @@ class InstagramExtractor:
         logger.info("Refreshing %d cached posts", total)
         refreshed = 0
         failed: list[str] = []
+        last_call = float("-inf")
 
         for i, pk in enumerate(pks, start=1):
             logger.info(
@@ -239,6 +254,7 @@ class InstagramExtractor:
                 refreshed,
                 len(failed),
             )
+            last_call = _pace(last_call, delay)
             try:
                 media: Media = self._fetch_media(pk)
                 self.cache_manager.save_post(media)
@@ -247,7 +263,6 @@ class InstagramExtractor:
             except (InstagramFetchError, ClientError):
                 logger.exception("[%d/%d] failed to refresh pk=%s", i, total, pk)
                 failed.append(pk)
-            time.sleep(delay)
 
         return refreshed, failed
 
@@ -271,7 +286,6 @@ def load_or_fetch_collection(
 
     extractor = InstagramExtractor(environment, cache_dir=cache_dir)
 
-    posts = []
     fetched = 0
     # Fetch posts from Instagram
     if not (collection := cache_manager.get_collection(collection_id)):
@@ -285,13 +299,14 @@ def load_or_fetch_collection(
         )
         if not batch:
             break
-        posts.extend(batch)
+        # Each batch is cached as it arrives; keep only the count so fetched
+        # Media objects can be freed instead of piling up for a log line.
         fetched += len(batch)
         collection = cache_manager.save_collection(collection_id, batch)
 
     logger.info(
         "Successfully fetched/loaded %d posts for collection %s",
-        len(posts),
+        fetched,
         collection_id,
     )
     return collection
@@ -7,12 +7,27 @@ from typing import Any
 from instagrapi.types import Media
 from openai import OpenAI
 from openai.types import Batch
-from pydantic import ValidationError
-
+from pydantic import TypeAdapter, ValidationError
+
+from foodiegram.batch_tasks import (
+    build_batch_task,
+    extraction_prompt,
+    extraction_schema,
+    looks_like_recipe,
+    result_fingerprint,
+)
 from foodiegram.domain import ExtractedRecipe, Recipe
 
 logger = logging.getLogger(__name__)
 
+# Batch polling backs off from a quick first check to a slow steady state:
+# small batches finish responsively, day-long ones don't spam the API.
+_POLL_INITIAL_SECONDS = 5.0
+_POLL_MAX_SECONDS = 300.0
+_POLL_BACKOFF = 1.5
+
+_RECIPE_LIST_ADAPTER = TypeAdapter(list[Recipe])
+
 
 class RecipeExtractor:
     """Recipe extraction system optimized for comprehensive data extraction.
@@ -28,63 +43,60 @@ class RecipeExtractor:
 
     def create_batch(self, posts: list[Media]) -> str:
         """Create batch job for recipe extraction."""
-        tasks_path = Path("data/tasks.jsonl")
-        tasks_path.parent.mkdir(exist_ok=True)
-
-        # Load comprehensive prompt
-        instruction = Path(
-            "src/foodiegram/prompts/extract_recipe_details.txt",
-        ).read_text()
-        schema = ExtractedRecipe.model_json_schema()
-
-        with tasks_path.open("w") as f:
-            for post in posts:
-                if not post.caption_text.strip():
-                    continue
-
-                line = {
-                    "custom_id": f"recipe-{post.id}",
-                    "method": "POST",
-                    "url": "/v1/responses",
-                    "body": {
-                        "model": self.model,
-                        "input": instruction.format(caption=post.caption_text),
-                        "text": {
-                            "format": {
-                                "type": "json_schema",
-                                "name": "ComprehensiveRecipe",
-                                "schema": schema,
-                                "strict": True,
-                            },
-                        },
-                    },
-                }
-                f.write(json.dumps(line, ensure_ascii=False) + "\n")
-
-        logger.info("Created %d tasks", len(list(tasks_path.open())) - 1)
+        instruction = extraction_prompt()
+        schema = extraction_schema()
+
+        lines = [
+            json.dumps(
+                build_batch_task(
+                    f"recipe-{post.id}",
+                    post.caption_text,
+                    model=self.model,
+                    instructions=instruction,
+                    schema=schema,
+                ),
+                ensure_ascii=False,
+            )
+            for post in posts
+            if looks_like_recipe(post.caption_text)
+        ]
+        payload = "".join(f"{line}\n" for line in lines).encode()
+        logger.info(
+            "Created %d tasks (%d posts skipped as non-recipes)",
+            len(lines),
+            len(posts) - len(lines),
+        )
 
-        # Upload and create batch
-        with tasks_path.open("rb") as f:
-            upload = self._client.files.create(file=f, purpose="batch")
+        # Upload straight from memory; the on-disk copy is only for inspection.
+        upload = self._client.files.create(
+            file=("tasks.jsonl", payload),
+            purpose="batch",
+        )
 
         batch = self._client.batches.create(
             input_file_id=upload.id,
             endpoint="/v1/responses",
             completion_window="24h",
         )
-        tasks_path.rename(Path(f"data/{batch.id}_tasks.jsonl"))
+        tasks_path = Path(f"data/{batch.id}_tasks.jsonl")
+        tasks_path.parent.mkdir(exist_ok=True)
+        tasks_path.write_bytes(payload)
         return batch.id
 
     def wait_for_batch(self, batch_id: str) -> Batch:
         """Wait for batch completion with progress updates."""
         logger.info("Waiting for batch %s...", batch_id)
-        start_time = time.time()
+        start_time = time.monotonic()
+        interval = _POLL_INITIAL_SECONDS
+        expiry_logged = False
 
         while True:
             batch = self._client.batches.retrieve(batch_id)
-            elapsed = time.time() - start_time
+            elapsed = time.monotonic() - start_time
 
-            if batch.expires_at:
+            # The expiry never changes for a batch; repeating it every poll only
+            # buries the progress lines.
+            if batch.expires_at and not expiry_logged:
                 expires_at = time.strftime(
                     "%Y-%m-%d %H:%M:%S",
                     time.localtime(int(batch.expires_at)),
@@ -94,6 +106,7 @@ class RecipeExtractor:
                     batch.expires_at,
                     expires_at,
                 )
+                expiry_logged = True
 
             # Show progress if available
             if hasattr(batch, "request_counts") and batch.request_counts:
@@ -115,7 +128,10 @@ class RecipeExtractor:
                 logger.info("Batch %s after %.1fs", batch.status, elapsed)
                 return batch
 
-            time.sleep(30)
+            time.sleep(interval)
+            # Back off on every poll, progress or not: a steadily progressing
+            # batch would otherwise stay pinned at the initial interval.
+            interval = min(interval * _POLL_BACKOFF, _POLL_MAX_SECONDS)
 
     def download_results(self, batch: Batch) -> None:
         """Download batch results and return file paths."""
@@ -123,15 +139,18 @@ class RecipeExtractor:
         errors_path = Path(f"data/{batch.id}_errors.jsonl")
 
         if batch.error_file_id:
-            content = self._client.files.content(batch.error_file_id).text
-            errors_path.write_text(content, encoding="utf-8")
+            self._download_file(batch.error_file_id, errors_path)
             logger.info("Downloaded errors to %s", errors_path)
 
         if batch.output_file_id:
-            content = self._client.files.content(batch.output_file_id).text
-            results_path.write_text(content, encoding="utf-8")
+            self._download_file(batch.output_file_id, results_path)
             logger.info("Downloaded results to %s", results_path)
 
+    def _download_file(self, file_id: str, path: Path) -> None:
+        """Stream an OpenAI file to path without buffering it in memory."""
+        with self._client.files.with_streaming_response.content(file_id) as response:
+            response.stream_to_file(path)
+
     def parse_results(self, posts: list[Media], batch_id: str) -> list[Recipe]:
         """Parse batch results into Recipe objects with comprehensive data."""
         results_path = Path(f"data/{batch_id}_results.jsonl")
@@ -145,43 +164,48 @@ class RecipeExtractor:
 
         logger.info("Parsing results from %s", results_path)
 
-        for line_num, line in enumerate(results_path.read_text().splitlines(), 1):
-            if not line.strip():
-                continue
+        # Stream line by line; json.loads takes the raw bytes, so the file is
+        # never decoded or held in memory as a whole.
+        with results_path.open("rb") as results_file:
+            for line_num, line in enumerate(results_file, 1):
+                if not line.strip():
+                    continue
 
-            try:
-                result = json.loads(line)
-                custom_id = result["custom_id"]
+                try:
+                    result = json.loads(line)
+                    custom_id = result["custom_id"]
 
-                if custom_id not in post_lookup:
-                    logger.warning("Unknown custom_id: %s", custom_id)
-                    continue
+                    if custom_id not in post_lookup:
+                        logger.warning("Unknown custom_id: %s", custom_id)
+                        continue
 
-                post = post_lookup[custom_id]
+                    post = post_lookup[custom_id]
 
-                response_body = result["response"]["body"]
-                recipe_data = json.loads(
-                    response_body["output"][0]["content"][0]["text"],
-                )
+                    response_body = result["response"]["body"]
+                    extracted = ExtractedRecipe.model_validate_json(
+                        response_body["output"][0]["content"][0]["text"],
+                    )
 
-                extracted = ExtractedRecipe.model_validate(recipe_data)
-                recipe = Recipe.from_extracted(
-                    code=post.code,
-                    pk=str(post.pk),
-                    caption=post.caption_text,
-                    extracted=extracted,
-                ).model_copy(
-                    update={
-                        "thumbnail_url": str(post.thumbnail_url)
-                        if post.thumbnail_url
-                        else None,
-                    },
-                )
-                recipes.append(recipe)
+                    recipe = Recipe.from_extracted(
+                        code=post.code,
+                        pk=str(post.pk),
+                        caption=post.caption_text,
+                        extracted=extracted,
+                    ).model_copy(
+                        update={
+                            "thumbnail_url": str(post.thumbnail_url)
+                            if post.thumbnail_url
+                            else None,
+                            "extraction_fingerprint": result_fingerprint(
+                                response_body,
+                            ),
+                        },
+                    )
+                    recipes.append(recipe)
 
-            except (KeyError, json.JSONDecodeError, ValidationError):
-                logger.exception("Error parsing line %d", line_num)
-                continue
+                except (KeyError, json.JSONDecodeError, ValidationError):
+                    logger.exception("Error parsing line %d", line_num)
+                    continue
 
         logger.info("Successfully parsed %d recipes", len(recipes))
         return recipes
@@ -192,47 +216,63 @@ class RecipeExtractor:
             return {"error": "No recipes to analyze"}
 
         total = len(recipes)
-
-        # Count field completeness
-        complete_fields = {
-            "has_title": sum(1 for r in recipes if r.title and r.title != "unknown"),
-            "has_ingredients": sum(1 for r in recipes if r.ingredients),
-            "has_instructions": sum(1 for r in recipes if r.instructions),
-            "has_proteins": sum(1 for r in recipes if r.proteins),
-            "has_vegetables": sum(1 for r in recipes if r.vegetables),
-            "has_cooking_methods": sum(1 for r in recipes if r.cooking_methods),
-            "has_season": sum(
-                1 for r in recipes if r.season and "unknown" not in r.season
+        complete_fields = dict.fromkeys(
+            (
+                "has_title",
+                "has_ingredients",
+                "has_instructions",
+                "has_proteins",
+                "has_vegetables",
+                "has_cooking_methods",
+                "has_season",
+                "has_occasion",
+                "has_dietary_tags",
             ),
-            "has_occasion": sum(1 for r in recipes if r.occasion),
-            "has_dietary_tags": sum(1 for r in recipes if r.dietary_tags),
-        }
+            0,
+        )
+        cuisines: set[str] = set()
+        cooking_methods: set[str] = set()
+        proteins: set[str] = set()
+        vegetables: set[str] = set()
+        ingredient_count = 0
+        tag_count = 0
+
+        # One pass over the recipes; every aggregate below reads the same fields.
+        for r in recipes:
+            complete_fields["has_title"] += bool(r.title and r.title != "unknown")
+            complete_fields["has_ingredients"] += bool(r.ingredients)
+            complete_fields["has_instructions"] += bool(r.instructions)
+            complete_fields["has_proteins"] += bool(r.proteins)
+            complete_fields["has_vegetables"] += bool(r.vegetables)
+            complete_fields["has_cooking_methods"] += bool(r.cooking_methods)
+            complete_fields["has_season"] += bool(
+                r.season and "unknown" not in r.season,
+            )
+            complete_fields["has_occasion"] += bool(r.occasion)
+            complete_fields["has_dietary_tags"] += bool(r.dietary_tags)
+            cuisines.add(r.cuisine_type)
+            cooking_methods.update(r.cooking_methods)
+            proteins.update(r.proteins)
+            vegetables.update(r.vegetables)
+            ingredient_count += len(r.ingredients)
+            tag_count += len(r.dietary_tags) + len(r.style_tags) + len(r.occasion)
 
         # Calculate percentages
         completeness = {
             k: f"{(v / total) * 100:.1f}%" for k, v in complete_fields.items()
         }
 
-        # Count unique values
-        unique_counts = {
-            "cuisines": len({r.cuisine_type for r in recipes}),
-            "cooking_methods": len(
-                {method for r in recipes for method in r.cooking_methods},
-            ),
-            "proteins": len({protein for r in recipes for protein in r.proteins}),
-            "vegetables": len({veg for r in recipes for veg in r.vegetables}),
-        }
-
         return {
             "total_recipes": total,
             "field_completeness": completeness,
-            "unique_values": unique_counts,
-            "avg_ingredients_per_recipe": sum(len(r.ingredients) for r in recipes)
-            / total,
-            "avg_tags_per_recipe": sum(
-                len(r.dietary_tags + r.style_tags + r.occasion) for r in recipes
-            )
-            / total,
+            "unique_values": {
+                "cuisines": len(cuisines),
+                "cooking_methods": len(cooking_methods),
+                "proteins": len(proteins),
+                "vegetables": len(vegetables),
+            },
+            "avg_ingredients_per_recipe": ingredient_count / total,
+            "avg_tags_per_recipe": tag_count / total,
         }
 
     def save_analysis(
@@ -241,8 +281,9 @@ class RecipeExtractor:
         output_path: Path = Path("analyzed_recipes.json"),
     ) -> None:
         """Save recipes with analysis metadata."""
-        # Convert recipes to dict format
-        recipes_data = [recipe.model_dump() for recipe in recipes]
+        # One pydantic-core call for the whole list; JSON mode renders datetimes
+        # and enums natively, so stdlib json can take the result as-is.
+        recipes_data = _RECIPE_LIST_ADAPTER.dump_python(recipes, mode="json")
 
         # Add analysis metadata
         analysis = self.analyze_extraction_quality(recipes)
@@ -257,7 +298,13 @@ class RecipeExtractor:
             "recipes": recipes_data,
         }
 
-        output_path.write_text(json.dumps(output_data, indent=2, ensure_ascii=False))
+        # Write to a sibling and swap it in so a crash never leaves half a file.
+        tmp = output_path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps(output_data, indent=2, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        tmp.replace(output_path)
         logger.info("Saved %d recipes to %s", len(recipes), output_path)
 
         # logger quality summary
@@ -1,5 +1,6 @@
 import logging
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from pydantic import ValidationError
 
@@ -8,9 +9,32 @@ from foodiegram.domain.errors import StorageError
 from foodiegram.domain.models import Recipe
 from foodiegram.domain.synonyms import expand_term
 
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
 logger = logging.getLogger(__name__)
 
 
+def _any_match(values: list[str], wanted: set[str]) -> bool:
+    """Return True if any of values, lowercased, is in wanted."""
+    return any(v.lower() in wanted for v in values)
+
+
+def _text_match(recipe: Recipe, needles: set[str]) -> bool:
+    """Return True if any needle occurs in the title, an ingredient or the caption."""
+    title = recipe.title.lower()
+    if any(needle in title for needle in needles):
+        return True
+    for ingredient in recipe.ingredients:
+        ing = ingredient.lower()
+        if any(needle in ing for needle in needles):
+            return True
+    if recipe.caption is None:
+        return False
+    caption = recipe.caption.lower()
+    return any(needle in caption for needle in needles)
+
+
 class RecipeRepository:
     """JSON-backed store for Recipe objects, keyed by Instagram shortcode."""
 
@@ -18,21 +42,39 @@ class RecipeRepository:
         """Initialize repository, creating data_dir if absent."""
         self._data_dir = data_dir
         self._data_dir.mkdir(parents=True, exist_ok=True)
+        # Parsed recipes keyed by path, tagged with the file's (inode, mtime,
+        # size). Saves go through an atomic replace, so any write, ours or
+        # another process's, changes the tag and forces a re-parse.
+        self._parsed: dict[Path, tuple[tuple[int, int, int], Recipe]] = {}
 
     def _path(self, code: str) -> Path:
         """Return the JSON file path for a shortcode."""
         return self._data_dir / f"{code}.json"
 
-    def get(self, code: str) -> Recipe | None:
-        """Return the recipe for code, or None if it does not exist."""
-        path = self._path(code)
-        if not path.exists():
-            return None
+    def _load(self, path: Path) -> Recipe:
+        """Return the recipe stored at path, re-parsing only if the file changed.
+
+        Raises FileNotFoundError if path is missing, StorageError if corrupt.
+        """
+        stat = path.stat()
+        tag = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self._parsed.get(path)
+        if cached is not None and cached[0] == tag:
+            return cached[1]
         try:
-            return Recipe.model_validate_json(path.read_bytes())
+            recipe = Recipe.model_validate_json(path.read_bytes())
         except (ValidationError, ValueError) as exc:
             msg = f"Corrupt recipe file {path}"
             raise StorageError(msg) from exc
+        self._parsed[path] = (tag, recipe)
+        return recipe
+
+    def get(self, code: str) -> Recipe | None:
+        """Return the recipe for code, or None if it does not exist."""
+        try:
+            return self._load(self._path(code))
+        except FileNotFoundError:
+            return None
 
     def save(self, recipe: Recipe) -> None:
         """Persist recipe to {code}.json, preserving user edits on re-extraction.
@@ -75,12 +117,12 @@ class RecipeRepository:
         recipes: list[Recipe] = []
         for json_file in sorted(self._data_dir.glob("*.json")):
             try:
-                recipe = self.get(json_file.stem)
+                recipes.append(self._load(json_file))
+            except FileNotFoundError:
+                # Deleted between the glob and the read.
+                continue
             except StorageError:
                 logger.exception("Skipping corrupt recipe file %s", json_file)
-                continue
-            if recipe is not None:
-                recipes.append(recipe)
         return recipes
 
     def delete(self, code: str) -> bool:
@@ -93,6 +135,7 @@ class RecipeRepository:
         except OSError as exc:
             msg = f"Failed to delete recipe {code}"
             raise StorageError(msg) from exc
+        self._parsed.pop(path, None)
         logger.info("Deleted recipe %s", code)
         return True
 
@@ -116,41 +159,29 @@ class RecipeRepository:
         q is a case-insensitive substring match on title, caption, and
         ingredients, expanded via synonyms so "courgette" finds "zucchini" too.
         """
-        results = self.list_all()
-
+        # Resolve every criterion (synonym expansion, lowercasing) once, then
+        # test each recipe against the active checks in a single pass.
+        checks: list[Callable[[Recipe], bool]] = []
         if cuisine is not None:
-            results = [r for r in results if r.cuisine_type == cuisine]
+            checks.append(lambda r: r.cuisine_type == cuisine)
         if meal_type is not None:
-            results = [r for r in results if r.meal_type == meal_type]
+            checks.append(lambda r: r.meal_type == meal_type)
         if dish_type is not None:
-            results = [r for r in results if r.dish_type == dish_type]
+            checks.append(lambda r: r.dish_type == dish_type)
         if difficulty is not None:
-            results = [r for r in results if r.difficulty == difficulty]
+            checks.append(lambda r: r.difficulty == difficulty)
+        if is_favorite is not None:
+            checks.append(lambda r: r.is_favorite == is_favorite)
         if dietary_tags is not None:
             expanded_tags = {s.lower() for t in dietary_tags for s in expand_term(t)}
-            results = [
-                r for r in results if expanded_tags & {t.lower() for t in r.dietary_tags}
-            ]
+            checks.append(lambda r: _any_match(r.dietary_tags, expanded_tags))
         if proteins is not None:
             expanded_proteins = {s.lower() for p in proteins for s in expand_term(p)}
-            results = [
-                r for r in results if expanded_proteins & {p.lower() for p in r.proteins}
-            ]
+            checks.append(lambda r: _any_match(r.proteins, expanded_proteins))
         if q is not None:
             needles = {s.lower() for s in expand_term(q)}
-            results = [
-                r
-                for r in results
-                if any(needle in r.title.lower() for needle in needles)
-                or any(
-                    needle in ing.lower() for needle in needles for ing in r.ingredients
-                )
-                or (
-                    r.caption is not None
-                    and any(needle in r.caption.lower() for needle in needles)
-                )
-            ]
-        if is_favorite is not None:
-            results = [r for r in results if r.is_favorite == is_favorite]
+            checks.append(lambda r: _text_match(r, needles))
 
-        return results
+        if not checks:
+            return self.list_all()
+        return [r for r in self.list_all() if all(check(r) for check in checks)]
@@ -0,0 +1,181 @@
+from foodiegram.batch_tasks import (
+    build_batch_tasks,
+    extraction_fingerprint,
+    fan_out_targets,
+    index_recipes,
+    looks_like_recipe,
+    needs_extraction,
+    prompt_caption,
+    result_fingerprint,
+)
+from foodiegram.domain import Recipe
+
+# Instagram allows 30 hashtags per post.
+_MAX_TAGS = 30
+
+_MODEL = "gpt-4.1-mini"
+_PROMPT = "Extract the recipe from the Instagram caption given as input."
+_CAPTION = "Spaghetti al pomodoro: 320g spaghetti, 400g pelati, basilico. " * 2
+
+_EXTRACTED = Recipe(
+    code="DJq4i8ysCL8",
+    pk="3632964741769470716",
+    post_url="https://www.instagram.com/p/DJq4i8ysCL8/",
+    caption=_CAPTION,
+    title="Spaghetti al pomodoro",
+    ingredients=["320g spaghetti", "400g pelati"],
+    instructions=["Cuocere la pasta", "Condire con il sugo"],
+    extraction_fingerprint=extraction_fingerprint(_MODEL, _PROMPT, _CAPTION),
+)
+
+
+def test_prompt_caption_drops_trailing_tag_block() -> None:
+    """Hashtags and mentions closing the caption are removed."""
+    caption = "Pasta al pomodoro.\n\nCuocere la pasta.\n.\n#food #pasta @chef #yum "
+    assert prompt_caption(caption) == "Pasta al pomodoro.\n\nCuocere la pasta.\n."
+
+
+def test_prompt_caption_keeps_inline_tags() -> None:
+    """Tags followed by real text stay, since they often name the dish."""
+    caption = "La mia #carbonara preferita, 100% #vegan"
+    assert prompt_caption(caption) == "La mia #carbonara preferita, 100%"
+    assert prompt_caption("no tags here") == "no tags here"
+
+
+def test_prompt_caption_strips_glued_tags() -> None:
+    """Tags written without spaces between them count as one trailing block."""
+    assert prompt_caption("Tiramisù #dolce#caffè#mascarpone") == "Tiramisù"
+
+
+def test_prompt_caption_is_linear_on_glued_tag_runs() -> None:
+    """A long glued tag run followed by text returns promptly and unchanged."""
+    caption = "#a" * _MAX_TAGS * 10 + " buonissimo"
+    assert prompt_caption(caption) == caption
+    assert prompt_caption("buonissimo " + "#a" * _MAX_TAGS * 10) == "buonissimo"
+
+
+def test_long_captions_look_like_recipes() -> None:
+    """Captions long enough to hold a recipe pass without any keyword."""
+    assert looks_like_recipe("Una giornata al mare con gli amici di sempre. " * 2)
+
+
+def test_short_captions_need_a_recipe_hint() -> None:
+    """Short captions pass only with a quantity or cooking word."""
+    assert looks_like_recipe("200g spaghetti, 2 uova")
+    assert looks_like_recipe("Ricetta in bio!")
+    assert looks_like_recipe("Bake at 180 for 20 min")
+    assert not looks_like_recipe("Che bontà 😍")
+    assert not looks_like_recipe("")
+
+
+def _forced(recipe: Recipe, *, model: str = _MODEL, prompt: str = _PROMPT) -> bool:
+    """Return whether a forced submit would select recipe."""
+    return needs_extraction(recipe, model=model, prompt=prompt, force=True)
+
+
+def test_forced_submit_skips_matching_fingerprint() -> None:
+    """A recipe extracted from the same model, prompt and caption is skipped."""
+    assert not _forced(_EXTRACTED)
+
+
+def test_forced_submit_resubmits_changed_inputs() -> None:
+    """A changed caption, prompt or model makes the stored fingerprint stale."""
+    edited_caption = _EXTRACTED.model_copy(
+        update={"caption": _CAPTION + "Buon appetito!"},
+    )
+    assert _forced(edited_caption)
+    assert _forced(_EXTRACTED, prompt=_PROMPT + " Translate to English.")
+    assert _forced(_EXTRACTED, model="gpt-4.1")
+
+
+def test_forced_submit_resubmits_legacy_recipes() -> None:
+    """Recipes extracted before fingerprints existed are always resubmitted."""
+    assert _forced(_EXTRACTED.model_copy(update={"extraction_fingerprint": None}))
+
+
+def test_forced_submit_never_touches_user_edits() -> None:
+    """User-edited recipes are skipped whatever their fingerprint."""
+    edited = _EXTRACTED.model_copy(
+        update={"edited_by_user": True, "extraction_fingerprint": None},
+    )
+    assert not _forced(edited)
+
+
+def test_plain_submit_selects_only_unextracted_recipes() -> None:
+    """Without force, only recipes lacking instructions are selected."""
+    pending = _EXTRACTED.model_copy(
+        update={"instructions": [], "extraction_fingerprint": None},
+    )
+    assert needs_extraction(pending, model=_MODEL, prompt=_PROMPT)
+    assert not needs_extraction(_EXTRACTED, model=_MODEL, prompt=_PROMPT)
+
+
+def test_short_captions_are_never_submitted() -> None:
+    """Captions under the minimum length are skipped even when forced."""
+    short = _EXTRACTED.model_copy(update={"caption": "Pasta!", "instructions": []})
+    assert not needs_extraction(short, model=_MODEL, prompt=_PROMPT)
+    assert not _forced(short)
+
+
+def _pending(code: str) -> Recipe:
+    """Return a not-yet-extracted recipe sharing _EXTRACTED's caption."""
+    return _EXTRACTED.model_copy(
+        update={"code": code, "instructions": [], "extraction_fingerprint": None},
+    )
+
+
+def _targets(submitted: Recipe, *siblings: Recipe, force: bool) -> list[str]:
+    """Return the codes an apply would write for submitted's result."""
+    _, by_caption = index_recipes([submitted, *siblings])
+    targets = fan_out_targets(
+        submitted,
+        by_caption,
+        model=_MODEL,
+        prompt=_PROMPT,
+        force=force,
+    )
+    return [r.code for r in targets]
+
+
+def test_plain_submit_keeps_extracted_siblings() -> None:
+    """A plain submit's result never overwrites a sibling with instructions."""
+    submitted = _pending("REPOST0001")
+    assert _targets(submitted, _EXTRACTED, _pending("REPOST0002"), force=False) == [
+        "REPOST0001",
+        "REPOST0002",
+    ]
+
+
+def test_forced_submit_keeps_current_siblings() -> None:
+    """A forced submit skips siblings already extracted from the same inputs."""
+    stale = _EXTRACTED.model_copy(
+        update={"code": "REPOST0002", "extraction_fingerprint": "stale"},
+    )
+    submitted = _pending("REPOST0001")
+    assert _targets(submitted, _EXTRACTED, stale, force=True) == [
+        "REPOST0001",
+        "REPOST0002",
+    ]
+
+
+def test_user_edited_siblings_are_never_targeted() -> None:
+    """Siblings edited by the user keep their data under any submit."""
+    edited = _pending("REPOST0002").model_copy(update={"edited_by_user": True})
+    submitted = _pending("REPOST0001")
+    assert _targets(submitted, edited, force=False) == ["REPOST0001"]
+    assert _targets(submitted, edited, force=True) == ["REPOST0001"]
+
+
+def test_one_task_per_distinct_caption() -> None:
+    """Recipes sharing a caption produce a single task for the first of them."""
+    other = _pending("OTHER00001").model_copy(update={"caption": _CAPTION + "Bis!"})
+    recipes = [_pending("REPOST0001"), _pending("REPOST0002"), other]
+    tasks = build_batch_tasks(recipes, model=_MODEL, instructions=_PROMPT, schema={})
+    assert [task["custom_id"] for task in tasks] == ["REPOST0001", "OTHER00001"]
+
+
+def test_result_fingerprint_tolerates_missing_metadata() -> None:
+    """Null or absent response metadata yields no fingerprint instead of raising."""
+    assert result_fingerprint({"metadata": {"fingerprint": "abc"}}) == "abc"
+    assert result_fingerprint({"metadata": None}) is None
+    assert result_fingerprint({}) is None
@@ -0,0 +1,83 @@
+from foodiegram.domain import (
+    CuisineType,
+    Difficulty,
+    DishType,
+    ExtractedRecipe,
+    MealType,
+    Recipe,
+)
+
+_BASE_SERVINGS = 3
+
+_EXTRACTED = ExtractedRecipe(
+    title="Pasta al pomodoro",
+    ingredients=["320g spaghetti", "400g pomodori pelati"],
+    instructions=["Cuocere la pasta", "Condire con il sugo"],
+    dish_type="main_course",
+    meal_type="dinner",
+    cuisine_type="italian",
+    difficulty="easy",
+    proteins=[],
+    vegetables=["tomato"],
+    grains_starches=["pasta"],
+    herbs_spices=["basil"],
+    cooking_methods=["boiling"],
+    equipment=["pot"],
+    prep_time="5 minutes",
+    cook_time="15 minutes",
+    total_time="20 minutes",
+    servings=f"{_BASE_SERVINGS}-4",
+    temperature="hot",
+    texture=[],
+    flavor_profile=["savory"],
+    dietary_tags=["vegetarian"],
+    health_tags=[],
+    season=["year_round"],
+    occasion=["weeknight"],
+    skill_level="beginner",
+    style_tags=["home_cooking"],
+    prep_style=["quick"],
+    is_recipe=True,
+    confidence=0.9,
+)
+
+
+def _build(extracted: ExtractedRecipe) -> Recipe:
+    """Build a Recipe from extracted data with fixed post metadata."""
+    return Recipe.from_extracted(
+        code="DJq4i8ysCL8",
+        pk="3632964741769470716",
+        caption="Spaghetti al pomodoro...",
+        extracted=extracted,
+    )
+
+
+def test_known_classifications_map_to_enums() -> None:
+    """Valid LLM classification strings become the matching enum members."""
+    recipe = _build(_EXTRACTED)
+    assert recipe.meal_type is MealType.DINNER
+    assert recipe.dish_type is DishType.MAIN_COURSE
+    assert recipe.cuisine_type is CuisineType.ITALIAN
+    assert recipe.difficulty is Difficulty.EASY
+
+
+def test_unknown_classifications_fall_back_to_unknown() -> None:
+    """Values outside the closed sets degrade to UNKNOWN instead of failing."""
+    extracted = _EXTRACTED.model_copy(
+        update={
+            "meal_type": "brunch",
+            "dish_type": "casserole",
+            "cuisine_type": "peruvian",
+            "difficulty": "Easy",
+        },
+    )
+    recipe = _build(extracted)
+    assert recipe.meal_type is MealType.UNKNOWN
+    assert recipe.dish_type is DishType.UNKNOWN
+    assert recipe.cuisine_type is CuisineType.UNKNOWN
+    assert recipe.difficulty is Difficulty.UNKNOWN
+
+
+def test_base_servings_parsed_from_first_number() -> None:
+    """base_servings takes the first integer from the servings string."""
+    assert _build(_EXTRACTED).base_servings == _BASE_SERVINGS
@@ -0,0 +1,100 @@
+from pathlib import Path
+
+from foodiegram.domain import CuisineType, Recipe
+from foodiegram.repository import RecipeRepository
+
+_CARBONARA = Recipe(
+    code="CARBONARA1",
+    pk="1",
+    post_url="https://www.instagram.com/p/CARBONARA1/",
+    caption="La vera carbonara romana",
+    title="Spaghetti alla carbonara",
+    ingredients=["320g spaghetti", "4 tuorli", "150g guanciale"],
+    instructions=["Cuocere la pasta"],
+    cuisine_type=CuisineType.ITALIAN,
+    proteins=["Guanciale", "egg"],
+    dietary_tags=[],
+)
+
+_CURRY = Recipe(
+    code="CURRY00001",
+    pk="2",
+    post_url="https://www.instagram.com/p/CURRY00001/",
+    caption=None,
+    title="Chickpea curry",
+    ingredients=["400g chickpeas", "1 courgette"],
+    instructions=["Simmer everything"],
+    cuisine_type=CuisineType.ASIAN,
+    proteins=["chickpeas"],
+    dietary_tags=["Vegan"],
+    is_favorite=True,
+)
+
+
+def _build(tmp_path: Path) -> RecipeRepository:
+    """Build a repository holding the two sample recipes."""
+    repo = RecipeRepository(tmp_path)
+    repo.save(_CARBONARA)
+    repo.save(_CURRY)
+    return repo
+
+
+def _codes(recipes: list[Recipe]) -> list[str]:
+    """Return the shortcodes of recipes, in order."""
+    return [r.code for r in recipes]
+
+
+def test_find_without_criteria_returns_everything(tmp_path: Path) -> None:
+    """No criteria means no filtering, in file-name order."""
+    assert _codes(_build(tmp_path).find()) == ["CARBONARA1", "CURRY00001"]
+
+
+def test_find_combines_criteria_with_and(tmp_path: Path) -> None:
+    """A recipe must satisfy every given criterion to be returned."""
+    repo = _build(tmp_path)
+    assert _codes(repo.find(cuisine=CuisineType.ASIAN, is_favorite=True)) == [
+        "CURRY00001",
+    ]
+    assert repo.find(cuisine=CuisineType.ITALIAN, is_favorite=True) == []
+
+
+def test_find_tag_lists_match_any_case_insensitively(tmp_path: Path) -> None:
+    """dietary_tags and proteins pass on any overlap, ignoring case."""
+    repo = _build(tmp_path)
+    assert _codes(repo.find(dietary_tags=["vegan", "keto"])) == ["CURRY00001"]
+    assert _codes(repo.find(proteins=["guanciale"])) == ["CARBONARA1"]
+
+
+def test_find_text_query_uses_synonyms(tmp_path: Path) -> None:
+    """Text query searches title, ingredients and caption, expanded via synonyms."""
+    repo = _build(tmp_path)
+    assert _codes(repo.find(q="zucchini")) == ["CURRY00001"]
+    assert _codes(repo.find(q="ROMANA")) == ["CARBONARA1"]
+    assert _codes(repo.find(q="spaghetti")) == ["CARBONARA1"]
+
+
+def test_unchanged_files_are_not_reparsed(tmp_path: Path) -> None:
+    """Reading an untouched file again returns the cached Recipe object."""
+    repo = _build(tmp_path)
+    assert repo.get("CURRY00001") is repo.get("CURRY00001")
+
+
+def test_external_edits_are_picked_up(tmp_path: Path) -> None:
+    """A file rewritten outside the repository is re-parsed on the next read."""
+    repo = _build(tmp_path)
+    assert repo.get("CURRY00001") is not None
+    edited = _CURRY.model_copy(update={"title": "Chana masala"})
+    tmp = tmp_path / "CURRY00001.tmp"
+    tmp.write_text(edited.model_dump_json(), encoding="utf-8")
+    tmp.replace(tmp_path / "CURRY00001.json")
+    recipe = repo.get("CURRY00001")
+    assert recipe is not None
+    assert recipe.title == "Chana masala"
+
+
+def test_deleted_recipes_disappear(tmp_path: Path) -> None:
+    """delete() drops the recipe from get() and list_all()."""
+    repo = _build(tmp_path)
+    assert repo.delete("CARBONARA1")
+    assert repo.get("CARBONARA1") is None
+    assert _codes(repo.list_all()) == ["CURRY00001"]